@@ -928,3 +928,7 @@ def is_subcontracting_order_created(po_name) -> bool:
 		if frappe.db.exists("Subcontracting Order", {"purchase_order": po_name, "docstatus": ["=", 1]})
 		else False
 	)
+
+
+def on_doctype_update():
+	frappe.db.add_index("Purchase Order", ["supplier", "transaction_date"])
@@ -99,3 +99,4 @@ class PurchaseOrderItem(Document):
 
 def on_doctype_update():
 	frappe.db.add_index("Purchase Order Item", ["item_code", "warehouse"])
+	frappe.db.add_index("Purchase Order Item", ["parent", "schedule_date"])
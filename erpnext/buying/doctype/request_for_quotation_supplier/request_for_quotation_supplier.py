@@ -2,6 +2,7 @@
 # For license information, please see license.txt
 
 
+import frappe
 from frappe.model.document import Document
 
 
@@ -27,3 +28,7 @@ class RequestforQuotationSupplier(Document):
 	# end: auto-generated types
 
 	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Request for Quotation Supplier", ["supplier"])
@@ -198,9 +198,7 @@ def refresh_scorecards():
 def make_all_scorecards(docname):
 
 	sc = frappe.get_doc("Supplier Scorecard", docname)
-	supplier = frappe.get_doc("Supplier", sc.supplier)
-
-	start_date = getdate(supplier.creation)
+	start_date = getdate(frappe.get_cached_value("Supplier", sc.supplier, "creation"))
 	end_date = get_scorecard_date(sc.period, start_date)
 	todays = getdate(nowdate())
 
@@ -56,13 +56,15 @@ class SupplierScorecardPeriod(Document):
 			throw(_("Criteria weights must add up to 100%"))
 
 	def calculate_variables(self):
+		builtin_values = variable_functions.compute_all_variables(
+			self, [var.path for var in self.variables if "." not in var.path]
+		)
 		for var in self.variables:
 			if "." in var.path:
 				method_to_call = import_string_path(var.path)
 				var.value = method_to_call(self)
 			else:
-				method_to_call = getattr(variable_functions, var.path)
-				var.value = method_to_call(self)
+				var.value = builtin_values[var.path]
 
 	def calculate_criteria(self):
 		for crit in self.criteria:
@@ -127,7 +129,7 @@ def import_string_path(path):
 
 def make_supplier_scorecard(source_name, target_doc=None):
 	def update_criteria_fields(obj, target, source_parent):
-		target.max_score, target.formula = frappe.db.get_value(
+		target.max_score, target.formula = frappe.get_cached_value(
 			"Supplier Scorecard Criteria", obj.criteria_name, ["max_score", "formula"]
 		)
 
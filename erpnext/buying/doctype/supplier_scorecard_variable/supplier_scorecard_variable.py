@@ -2,15 +2,21 @@
 # For license information, please see license.txt
 
 
-import sys
+from functools import lru_cache, wraps
+from inspect import isfunction
+from types import MappingProxyType
 
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.query_builder.functions import Sum
+from frappe.query_builder.functions import Coalesce, Sum
 from frappe.utils import getdate
 
 
+# Seconds the period aggregates of a supplier are kept in redis
+SCORECARD_CACHE_TTL = 300
+
+
 class VariablePathNotFound(frappe.ValidationError):
 	pass
 
@@ -37,74 +43,201 @@ class SupplierScorecardVariable(Document):
 	def validate_path_exists(self):
 		if "." in self.path:
 			try:
-				from erpnext.buying.doctype.supplier_scorecard_period.supplier_scorecard_period import (
-					import_string_path,
-				)
-
-				import_string_path(self.path)
+				_resolve_path(self.path)
 			except AttributeError:
 				frappe.throw(_("Could not find path for " + self.path), VariablePathNotFound)
 
 		else:
-			if not hasattr(sys.modules[__name__], self.path):
+			if self.path not in VARIABLE_FUNCTIONS:
 				frappe.throw(_("Could not find path for " + self.path), VariablePathNotFound)
 
 
-def get_total_workdays(scorecard):
-	"""Gets the number of days in this period"""
-	delta = getdate(scorecard.end_date) - getdate(scorecard.start_date)
-	return delta.days
+@lru_cache(maxsize=None)
+def _resolve_path(path):
+	from erpnext.buying.doctype.supplier_scorecard_period.supplier_scorecard_period import (
+		import_string_path,
+	)
 
+	return import_string_path(path)
 
-def get_item_workdays(scorecard):
-	"""Gets the number of days in this period"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-	total_item_days = frappe.db.sql(
-		"""
-			SELECT
-				SUM(DATEDIFF( %(end_date)s, po_item.schedule_date) * (po_item.qty))
-			FROM
-				`tabPurchase Order Item` po_item,
-				`tabPurchase Order` po
-			WHERE
-				po.supplier = %(supplier)s
-				AND po_item.received_qty < po_item.qty
-				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.parent = po.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
 
-	if not total_item_days:
-		total_item_days = 0
-	return total_item_days
+def _scorecard_cache(func):
+	"""Caches the aggregates of a supplier for a period, for the request and in redis.
 
+	The redis key is made of `scorecard.supplier`, `scorecard.start_date`, `scorecard.end_date`
+	and the supplier's cache version. `clear_scorecard_cache` bumps the version, which leaves the
+	old keys to expire after `SCORECARD_CACHE_TTL` seconds."""
 
-def get_total_cost_of_shipments(scorecard):
-	"""Gets the total cost of all shipments in the period (based on Purchase Orders)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
+	@wraps(func)
+	def wrapper(supplier, start_date, end_date):
+		version = _get_scorecard_cache_version(supplier)
+		key = f"supplier_scorecard:{supplier}:{version}:{func.__name__}:{start_date}:{end_date}"
+		data = frappe.cache().get_value(key, expires=True)
+		if data is None:
+			data = func(supplier, start_date, end_date)
+			frappe.cache().set_value(key, data, expires_in_sec=SCORECARD_CACHE_TTL)
+		return data
+
+	return frappe.request_cache(wrapper)
+
+
+@frappe.request_cache
+def _get_scorecard_cache_version(supplier):
+	return frappe.cache().get_value(_get_scorecard_cache_version_key(supplier), expires=True) or 0
+
+
+def _get_scorecard_cache_version_key(supplier):
+	return f"supplier_scorecard_version:{supplier}"
+
+
+def clear_scorecard_cache(doc, method=None):
+	"""Invalidates the cached scorecard aggregates of the suppliers on a buying document.
+
+	The version is bumped after commit, so a concurrent refresh cannot keep the data being changed,
+	and after rollback, as aggregates read in the transaction may include its uncommitted rows.
+	Changes that skip the document hooks (e.g. `frappe.db.set_value` on `received_qty`) are only
+	seen once the cached aggregates expire."""
+	if doc.doctype == "Purchase Invoice" and not doc.get("update_stock"):
+		# only updates Purchase Order Item `received_qty` when it updates stock
+		return
 
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(po_item.base_amount)
+	suppliers = set()
+	for d in (doc, doc.get_doc_before_save()):
+		if not d:
+			continue
+
+		if d.doctype == "Request for Quotation":
+			suppliers.update(row.supplier for row in d.get("suppliers"))
+		else:
+			suppliers.add(d.supplier)
+
+	suppliers.discard(None)
+	if not suppliers:
+		return
+
+	def bump_cache_version():
+		for supplier in suppliers:
+			frappe.cache().set_value(
+				_get_scorecard_cache_version_key(supplier), frappe.generate_hash(length=10)
+			)
+
+	frappe.db.after_commit.add(bump_cache_version)
+	frappe.db.after_rollback.add(bump_cache_version)
+
+
+# Covers the rows every aggregate below starts from, so when nothing matches
+# all of them are known to be empty without running their joins
+_ACTIVITY_SQL = """
+	SELECT
+		EXISTS(
+			SELECT 1
 			FROM
-				`tabPurchase Order Item` po_item,
 				`tabPurchase Order` po
+				INNER JOIN `tabPurchase Order Item` po_item
+					ON po_item.parent = po.name
 			WHERE
 				po.supplier = %(supplier)s
 				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.docstatus = 1
-				AND po_item.parent = po.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
+		)
+		OR EXISTS(
+			SELECT 1
+			FROM
+				`tabPurchase Receipt` pr
+			WHERE
+				pr.supplier = %(supplier)s
+				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
+		)
+		OR EXISTS(
+			SELECT 1
+			FROM
+				`tabRequest for Quotation Supplier` rfq_sup
+				INNER JOIN `tabRequest for Quotation` rfq
+					ON rfq.name = rfq_sup.parent
+			WHERE
+				rfq_sup.supplier = %(supplier)s
+				AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
+		)"""
 
-	if data:
-		return data
-	else:
-		return 0
+
+@_scorecard_cache
+def _has_activity(supplier, start_date, end_date):
+	"""Returns whether the supplier has any purchase orders, receipts or RFQs in the period.
+
+	When it does not, the aggregate helpers return an empty dict, which the variables read as 0."""
+	return bool(
+		frappe.db.sql(
+			_ACTIVITY_SQL,
+			{"supplier": supplier, "start_date": start_date, "end_date": end_date},
+		)[0][0]
+	)
+
+
+def get_total_workdays(scorecard):
+	"""Gets the number of days in this period"""
+	delta = getdate(scorecard.end_date) - getdate(scorecard.start_date)
+	return delta.days
+
+
+def _get_po_aggregates(scorecard):
+	"""Returns the Purchase Order Item totals for items scheduled in the period"""
+	return _fetch_po_aggregates(scorecard.supplier, scorecard.start_date, scorecard.end_date)
+
+
+# The item day totals are SUM((end_date - schedule_date) * qty), factored as
+# end_date * SUM(qty) - SUM(schedule_date * qty) so end_date is applied only once
+_PO_AGGREGATES_SQL = """
+	SELECT
+		COALESCE(
+			TO_DAYS(%(end_date)s) * SUM(CASE WHEN po_item.received_qty < po_item.qty
+				THEN po_item.qty
+			END) - SUM(CASE WHEN po_item.received_qty < po_item.qty
+				THEN TO_DAYS(po_item.schedule_date) * po_item.qty
+			END),
+			0
+		) as item_workdays,
+		COALESCE(SUM(CASE WHEN po_item.docstatus = 1
+			THEN po_item.base_amount
+		END), 0) as total_cost_of_shipments,
+		COUNT(CASE WHEN po_item.docstatus = 1
+			THEN po_item.base_amount
+		END) as total_shipments,
+		COALESCE(
+			TO_DAYS(%(end_date)s) * SUM(CASE WHEN po_item.received_qty < po_item.qty
+				THEN po_item.qty - po_item.received_qty
+			END) - SUM(CASE WHEN po_item.received_qty < po_item.qty
+				THEN TO_DAYS(po_item.schedule_date) * (po_item.qty - po_item.received_qty)
+			END),
+			0
+		) as missed_late_days
+	FROM
+		`tabPurchase Order` po
+		INNER JOIN `tabPurchase Order Item` po_item
+			ON po_item.parent = po.name
+	WHERE
+		po.supplier = %(supplier)s
+		AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s"""
+
+
+@_scorecard_cache
+def _fetch_po_aggregates(supplier, start_date, end_date):
+	if not _has_activity(supplier, start_date, end_date):
+		return frappe._dict()
+
+	return frappe.db.sql(
+		_PO_AGGREGATES_SQL,
+		{"supplier": supplier, "start_date": start_date, "end_date": end_date},
+		as_dict=1,
+	)[0]
+
+
+def get_item_workdays(scorecard):
+	"""Gets the number of days in this period"""
+	return _get_po_aggregates(scorecard).get("item_workdays", 0)
+
+
+def get_total_cost_of_shipments(scorecard):
+	"""Gets the total cost of all shipments in the period (based on Purchase Orders)"""
+	return _get_po_aggregates(scorecard).get("total_cost_of_shipments", 0)
 
 
 def get_cost_of_delayed_shipments(scorecard):
@@ -112,117 +245,63 @@ def get_cost_of_delayed_shipments(scorecard):
 	return get_total_cost_of_shipments(scorecard) - get_cost_of_on_time_shipments(scorecard)
 
 
-def get_cost_of_on_time_shipments(scorecard):
-	"""Gets the total cost of all on_time shipments in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
+def _get_po_pr_aggregates(scorecard):
+	"""Returns the Purchase Receipt totals against Purchase Order Items scheduled in the period"""
+	return _fetch_po_pr_aggregates(scorecard.supplier, scorecard.start_date, scorecard.end_date)
+
+
+_PO_PR_AGGREGATES_SQL = """
+	SELECT
+		COALESCE(SUM(CASE WHEN po_item.schedule_date >= pr.posting_date
+			THEN pr_item.base_amount
+		END), 0) as on_time_cost,
+		COALESCE(SUM(CASE WHEN po_item.schedule_date < pr.posting_date
+			THEN DATEDIFF(pr.posting_date, po_item.schedule_date) * pr_item.qty
+		END), 0) as delivered_late_days,
+		COUNT(CASE WHEN po_item.schedule_date <= pr.posting_date AND po_item.qty = pr_item.qty
+			THEN pr_item.qty
+		END) as on_time_shipments
+	FROM
+		`tabPurchase Order` po
+		INNER JOIN `tabPurchase Order Item` po_item
+			ON po_item.parent = po.name
+		INNER JOIN `tabPurchase Receipt Item` pr_item
+			ON pr_item.purchase_order_item = po_item.name
+		INNER JOIN `tabPurchase Receipt` pr
+			ON pr.name = pr_item.parent
+	WHERE
+		po.supplier = %(supplier)s
+		AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
+		AND pr_item.docstatus = 1"""
+
+
+@_scorecard_cache
+def _fetch_po_pr_aggregates(supplier, start_date, end_date):
+	if not _has_activity(supplier, start_date, end_date):
+		return frappe._dict()
+
+	return frappe.db.sql(
+		_PO_PR_AGGREGATES_SQL,
+		{"supplier": supplier, "start_date": start_date, "end_date": end_date},
+		as_dict=1,
+	)[0]
 
-	total_delivered_on_time_costs = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.base_amount)
-			FROM
-				`tabPurchase Order Item` po_item,
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Order` po,
-				`tabPurchase Receipt` pr
-			WHERE
-				po.supplier = %(supplier)s
-				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.schedule_date >= pr.posting_date
-				AND pr_item.docstatus = 1
-				AND pr_item.purchase_order_item = po_item.name
-				AND po_item.parent = po.name
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
 
-	if total_delivered_on_time_costs:
-		return total_delivered_on_time_costs
-	else:
-		return 0
+def get_cost_of_on_time_shipments(scorecard):
+	"""Gets the total cost of all on_time shipments in the period (based on Purchase Receipts)"""
+	return _get_po_pr_aggregates(scorecard).get("on_time_cost", 0)
 
 
 def get_total_days_late(scorecard):
 	"""Gets the number of item days late in the period (based on Purchase Receipts vs POs)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-	total_delivered_late_days = frappe.db.sql(
-		"""
-			SELECT
-				SUM(DATEDIFF(pr.posting_date,po_item.schedule_date)* pr_item.qty)
-			FROM
-				`tabPurchase Order Item` po_item,
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Order` po,
-				`tabPurchase Receipt` pr
-			WHERE
-				po.supplier = %(supplier)s
-				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.schedule_date < pr.posting_date
-				AND pr_item.docstatus = 1
-				AND pr_item.purchase_order_item = po_item.name
-				AND po_item.parent = po.name
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-	if not total_delivered_late_days:
-		total_delivered_late_days = 0
-
-	total_missed_late_days = frappe.db.sql(
-		"""
-			SELECT
-				SUM(DATEDIFF( %(end_date)s, po_item.schedule_date) * (po_item.qty - po_item.received_qty))
-			FROM
-				`tabPurchase Order Item` po_item,
-				`tabPurchase Order` po
-			WHERE
-				po.supplier = %(supplier)s
-				AND po_item.received_qty < po_item.qty
-				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.parent = po.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-
-	if not total_missed_late_days:
-		total_missed_late_days = 0
+	total_delivered_late_days = _get_po_pr_aggregates(scorecard).get("delivered_late_days", 0)
+	total_missed_late_days = _get_po_aggregates(scorecard).get("missed_late_days", 0)
 	return total_missed_late_days + total_delivered_late_days
 
 
 def get_on_time_shipments(scorecard):
 	"""Gets the number of late shipments (counting each item) in the period (based on Purchase Receipts vs POs)"""
-
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	total_items_delivered_on_time = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(pr_item.qty)
-			FROM
-				`tabPurchase Order Item` po_item,
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Order` po,
-				`tabPurchase Receipt` pr
-			WHERE
-				po.supplier = %(supplier)s
-				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.schedule_date <= pr.posting_date
-				AND po_item.qty = pr_item.qty
-				AND pr_item.docstatus = 1
-				AND pr_item.purchase_order_item = po_item.name
-				AND po_item.parent = po.name
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-
-	if not total_items_delivered_on_time:
-		total_items_delivered_on_time = 0
-	return total_items_delivered_on_time
+	return _get_po_pr_aggregates(scorecard).get("on_time_shipments", 0)
 
 
 def get_late_shipments(scorecard):
@@ -230,212 +309,80 @@ def get_late_shipments(scorecard):
 	return get_total_shipments(scorecard) - get_on_time_shipments(scorecard)
 
 
-def get_total_received(scorecard):
-	"""Gets the total number of received shipments in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(pr_item.base_amount)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
+def _get_pr_aggregates(scorecard):
+	"""Returns the Purchase Receipt totals used by the received / rejected / accepted variables"""
+	return _fetch_pr_aggregates(scorecard.supplier, scorecard.start_date, scorecard.end_date)
 
-	if not data:
-		data = 0
-	return data
 
+_PR_AGGREGATES_SQL = """
+	SELECT
+		COUNT(pr_item.base_amount) as total_received,
+		COALESCE(SUM(pr_item.received_qty * pr_item.base_rate), 0) as total_received_amount,
+		COALESCE(SUM(pr_item.received_qty), 0) as total_received_items,
+		COALESCE(SUM(pr_item.rejected_qty * pr_item.base_rate), 0) as total_rejected_amount,
+		COALESCE(SUM(pr_item.rejected_qty), 0) as total_rejected_items,
+		COALESCE(SUM(pr_item.qty * pr_item.base_rate), 0) as total_accepted_amount,
+		COALESCE(SUM(pr_item.qty), 0) as total_accepted_items
+	FROM
+		`tabPurchase Receipt` pr
+		INNER JOIN `tabPurchase Receipt Item` pr_item
+			ON pr_item.parent = pr.name
+	WHERE
+		pr.supplier = %(supplier)s
+		AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
+		AND pr_item.docstatus = 1"""
 
-def get_total_received_amount(scorecard):
-	"""Gets the total amount (in company currency) received in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
 
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.received_qty * pr_item.base_rate)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
+@_scorecard_cache
+def _fetch_pr_aggregates(supplier, start_date, end_date):
+	if not _has_activity(supplier, start_date, end_date):
+		return frappe._dict()
 
-	if not data:
-		data = 0
-	return data
+	return frappe.db.sql(
+		_PR_AGGREGATES_SQL,
+		{"supplier": supplier, "start_date": start_date, "end_date": end_date},
+		as_dict=1,
+	)[0]
 
 
-def get_total_received_items(scorecard):
+def get_total_received(scorecard):
 	"""Gets the total number of received shipments in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
+	return _get_pr_aggregates(scorecard).get("total_received", 0)
 
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.received_qty)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
 
-	if not data:
-		data = 0
-	return data
+def get_total_received_amount(scorecard):
+	"""Gets the total amount (in company currency) received in the period (based on Purchase Receipts)"""
+	return _get_pr_aggregates(scorecard).get("total_received_amount", 0)
 
 
-def get_total_rejected_amount(scorecard):
-	"""Gets the total amount (in company currency) rejected in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
+def get_total_received_items(scorecard):
+	"""Gets the total number of received shipments in the period (based on Purchase Receipts)"""
+	return _get_pr_aggregates(scorecard).get("total_received_items", 0)
 
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.rejected_qty * pr_item.base_rate)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
 
-	if not data:
-		data = 0
-	return data
+def get_total_rejected_amount(scorecard):
+	"""Gets the total amount (in company currency) rejected in the period (based on Purchase Receipts)"""
+	return _get_pr_aggregates(scorecard).get("total_rejected_amount", 0)
 
 
 def get_total_rejected_items(scorecard):
 	"""Gets the total number of rejected items in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.rejected_qty)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-
-	if not data:
-		data = 0
-	return data
+	return _get_pr_aggregates(scorecard).get("total_rejected_items", 0)
 
 
 def get_total_accepted_amount(scorecard):
 	"""Gets the total amount (in company currency) accepted in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.qty * pr_item.base_rate)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-
-	if not data:
-		data = 0
-	return data
+	return _get_pr_aggregates(scorecard).get("total_accepted_amount", 0)
 
 
 def get_total_accepted_items(scorecard):
 	"""Gets the total number of rejected items in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				SUM(pr_item.qty)
-			FROM
-				`tabPurchase Receipt Item` pr_item,
-				`tabPurchase Receipt` pr
-			WHERE
-				pr.supplier = %(supplier)s
-				AND pr.posting_date BETWEEN %(start_date)s AND %(end_date)s
-				AND pr_item.docstatus = 1
-				AND pr_item.parent = pr.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-
-	if not data:
-		data = 0
-	return data
+	return _get_pr_aggregates(scorecard).get("total_accepted_items", 0)
 
 
 def get_total_shipments(scorecard):
 	"""Gets the total number of ordered shipments to arrive in the period (based on Purchase Receipts)"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(po_item.base_amount)
-			FROM
-				`tabPurchase Order Item` po_item,
-				`tabPurchase Order` po
-			WHERE
-				po.supplier = %(supplier)s
-				AND po_item.schedule_date BETWEEN %(start_date)s AND %(end_date)s
-				AND po_item.docstatus = 1
-				AND po_item.parent = po.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-
-	if not data:
-		data = 0
-	return data
+	return _get_po_aggregates(scorecard).get("total_shipments", 0)
 
 
 def get_ordered_qty(scorecard):
@@ -445,14 +392,14 @@ def get_ordered_qty(scorecard):
 
 	return (
 		frappe.qb.from_(po)
-		.select(Sum(po.total_qty))
+		.select(Coalesce(Sum(po.total_qty), 0))
 		.where(
 			(po.supplier == scorecard.supplier)
 			& (po.docstatus == 1)
 			& (po.transaction_date >= scorecard.get("start_date"))
 			& (po.transaction_date <= scorecard.get("end_date"))
 		)
-	).run(as_list=True)[0][0] or 0
+	).run(as_list=True)[0][0]
 
 
 def get_invoiced_qty(scorecard):
@@ -462,164 +409,109 @@ def get_invoiced_qty(scorecard):
 
 	return (
 		frappe.qb.from_(pi)
-		.select(Sum(pi.total_qty))
+		.select(Coalesce(Sum(pi.total_qty), 0))
 		.where(
 			(pi.supplier == scorecard.supplier)
 			& (pi.docstatus == 1)
 			& (pi.posting_date >= scorecard.get("start_date"))
 			& (pi.posting_date <= scorecard.get("end_date"))
 		)
-	).run(as_list=True)[0][0] or 0
+	).run(as_list=True)[0][0]
+
+
+def _get_rfq_sq_aggregates(scorecard):
+	"""Returns the RFQ totals for the period along with the Supplier Quotations raised against them"""
+	return _fetch_rfq_sq_aggregates(scorecard.supplier, scorecard.start_date, scorecard.end_date)
+
+
+# RFQ items without a quotation are kept by the left join, so RFQ counts
+# are unaffected while quotation columns are NULL for those rows
+_RFQ_SQ_AGGREGATES_SQL = """
+	SELECT
+		COUNT(DISTINCT rfq.name) as rfq_total_number,
+		COUNT(DISTINCT rfq_item.name) as rfq_total_items,
+		COUNT(DISTINCT sq.name) as sq_total_number,
+		COUNT(DISTINCT sq_item.name) as sq_total_items,
+		COALESCE(SUM(DATEDIFF(sq.transaction_date, rfq.transaction_date)), 0) as rfq_response_days
+	FROM
+		`tabRequest for Quotation Supplier` rfq_sup
+		INNER JOIN `tabRequest for Quotation` rfq
+			ON rfq.name = rfq_sup.parent
+		INNER JOIN `tabRequest for Quotation Item` rfq_item
+			ON rfq_item.parent = rfq.name
+		LEFT JOIN (
+			`tabSupplier Quotation Item` sq_item
+			INNER JOIN `tabSupplier Quotation` sq
+				ON sq.name = sq_item.parent
+				AND sq.supplier = %(supplier)s
+		)
+			ON sq_item.request_for_quotation_item = rfq_item.name
+			AND sq_item.docstatus = 1
+	WHERE
+		rfq_sup.supplier = %(supplier)s
+		AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
+		AND rfq_item.docstatus = 1"""
 
 
-def get_rfq_total_number(scorecard):
-	"""Gets the total number of RFQs sent to supplier"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
+@_scorecard_cache
+def _fetch_rfq_sq_aggregates(supplier, start_date, end_date):
+	if not _has_activity(supplier, start_date, end_date):
+		return frappe._dict()
+
+	return frappe.db.sql(
+		_RFQ_SQ_AGGREGATES_SQL,
+		{"supplier": supplier, "start_date": start_date, "end_date": end_date},
+		as_dict=1,
+	)[0]
 
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(rfq.name) as total_rfqs
-			FROM
-				`tabRequest for Quotation Item` rfq_item,
-				`tabRequest for Quotation Supplier` rfq_sup,
-				`tabRequest for Quotation` rfq
-			WHERE
-				rfq_sup.supplier = %(supplier)s
-				AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
-				AND rfq_item.docstatus = 1
-				AND rfq_item.parent = rfq.name
-				AND rfq_sup.parent = rfq.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
 
-	if not data:
-		data = 0
-	return data
+def get_rfq_total_number(scorecard):
+	"""Gets the total number of RFQs sent to supplier"""
+	return _get_rfq_sq_aggregates(scorecard).get("rfq_total_number", 0)
 
 
 def get_rfq_total_items(scorecard):
 	"""Gets the total number of RFQ items sent to supplier"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(rfq_item.name) as total_rfqs
-			FROM
-				`tabRequest for Quotation Item` rfq_item,
-				`tabRequest for Quotation Supplier` rfq_sup,
-				`tabRequest for Quotation` rfq
-			WHERE
-				rfq_sup.supplier = %(supplier)s
-				AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
-				AND rfq_item.docstatus = 1
-				AND rfq_item.parent = rfq.name
-				AND rfq_sup.parent = rfq.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-	if not data:
-		data = 0
-	return data
+	return _get_rfq_sq_aggregates(scorecard).get("rfq_total_items", 0)
 
 
 def get_sq_total_number(scorecard):
 	"""Gets the total number of RFQ items sent to supplier"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(sq.name) as total_sqs
-			FROM
-				`tabRequest for Quotation Item` rfq_item,
-				`tabSupplier Quotation Item` sq_item,
-				`tabRequest for Quotation Supplier` rfq_sup,
-				`tabRequest for Quotation` rfq,
-				`tabSupplier Quotation` sq
-			WHERE
-				rfq_sup.supplier = %(supplier)s
-				AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
-				AND sq_item.request_for_quotation_item = rfq_item.name
-				AND sq_item.docstatus = 1
-				AND rfq_item.docstatus = 1
-				AND sq.supplier = %(supplier)s
-				AND sq_item.parent = sq.name
-				AND rfq_item.parent = rfq.name
-				AND rfq_sup.parent = rfq.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-	if not data:
-		data = 0
-	return data
+	return _get_rfq_sq_aggregates(scorecard).get("sq_total_number", 0)
 
 
 def get_sq_total_items(scorecard):
 	"""Gets the total number of RFQ items sent to supplier"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-
-	# Look up all PO Items with delivery dates between our dates
-	data = frappe.db.sql(
-		"""
-			SELECT
-				COUNT(sq_item.name) as total_sqs
-			FROM
-				`tabRequest for Quotation Item` rfq_item,
-				`tabSupplier Quotation Item` sq_item,
-				`tabSupplier Quotation` sq,
-				`tabRequest for Quotation Supplier` rfq_sup,
-				`tabRequest for Quotation` rfq
-			WHERE
-				rfq_sup.supplier = %(supplier)s
-				AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
-				AND sq_item.request_for_quotation_item = rfq_item.name
-				AND sq_item.docstatus = 1
-				AND sq.supplier = %(supplier)s
-				AND sq_item.parent = sq.name
-				AND rfq_item.docstatus = 1
-				AND rfq_item.parent = rfq.name
-				AND rfq_sup.parent = rfq.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-	if not data:
-		data = 0
-	return data
+	return _get_rfq_sq_aggregates(scorecard).get("sq_total_items", 0)
 
 
 def get_rfq_response_days(scorecard):
 	"""Gets the total number of days it has taken a supplier to respond to rfqs in the period"""
-	supplier = frappe.get_doc("Supplier", scorecard.supplier)
-	total_sq_days = frappe.db.sql(
-		"""
-			SELECT
-				SUM(DATEDIFF(sq.transaction_date, rfq.transaction_date))
-			FROM
-				`tabRequest for Quotation Item` rfq_item,
-				`tabSupplier Quotation Item` sq_item,
-				`tabSupplier Quotation` sq,
-				`tabRequest for Quotation Supplier` rfq_sup,
-				`tabRequest for Quotation` rfq
-			WHERE
-				rfq_sup.supplier = %(supplier)s
-				AND rfq.transaction_date BETWEEN %(start_date)s AND %(end_date)s
-				AND sq_item.request_for_quotation_item = rfq_item.name
-				AND sq_item.docstatus = 1
-				AND sq.supplier = %(supplier)s
-				AND sq_item.parent = sq.name
-				AND rfq_item.docstatus = 1
-				AND rfq_item.parent = rfq.name
-				AND rfq_sup.parent = rfq.name""",
-		{"supplier": supplier.name, "start_date": scorecard.start_date, "end_date": scorecard.end_date},
-		as_dict=0,
-	)[0][0]
-	if not total_sq_days:
-		total_sq_days = 0
-
-	return total_sq_days
+	return _get_rfq_sq_aggregates(scorecard).get("rfq_response_days", 0)
+
+
+def compute_all_variables(scorecard, paths=None):
+	"""Returns the values of the built-in variables at `paths` (all by default) for the scorecard
+	period, keyed by path. Variables sharing an aggregate read it once through the cached helpers."""
+	if paths is None:
+		paths = VARIABLE_FUNCTIONS.keys()
+
+	values = {}
+	for path in paths:
+		if path not in VARIABLE_FUNCTIONS:
+			frappe.throw(_("Could not find path for " + path), VariablePathNotFound)
+
+		if path not in values:
+			values[path] = VARIABLE_FUNCTIONS[path](scorecard)
+
+	return values
+
+
+# Built-in variables, keyed by the path set on a Supplier Scorecard Variable
+VARIABLE_FUNCTIONS = MappingProxyType(
+	{
+		name: fn
+		for name, fn in globals().items()
+		if name.startswith("get_") and isfunction(fn) and fn.__module__ == __name__
+	}
+)
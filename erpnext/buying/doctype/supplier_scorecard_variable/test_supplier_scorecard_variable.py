@@ -2,11 +2,26 @@
 # See license.txt
 
 
+from unittest.mock import patch
+
 import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, nowdate
 
+from erpnext.buying.doctype.purchase_order.purchase_order import make_purchase_receipt
+from erpnext.buying.doctype.purchase_order.test_purchase_order import create_purchase_order
+from erpnext.buying.doctype.request_for_quotation.request_for_quotation import (
+	make_supplier_quotation_from_rfq,
+)
+from erpnext.buying.doctype.request_for_quotation.test_request_for_quotation import (
+	make_request_for_quotation,
+)
+from erpnext.buying.doctype.supplier.test_supplier import create_supplier
 from erpnext.buying.doctype.supplier_scorecard_variable.supplier_scorecard_variable import (
 	VariablePathNotFound,
+	_get_scorecard_cache_version_key,
+	compute_all_variables,
+	get_total_shipments,
 )
 
 
@@ -27,6 +42,161 @@ class TestSupplierScorecardVariable(FrappeTestCase):
 		for d in test_bad_variables:
 			self.assertRaises(VariablePathNotFound, frappe.get_doc(d).insert)
 
+	def test_aggregates_are_cached_until_commit(self):
+		supplier = create_supplier().name
+		scorecard = get_scorecard_period(supplier)
+		self.assertEqual(get_total_shipments(scorecard), 0)
+
+		with patch.object(frappe.local.db, "after_commit") as after_commit:
+			po = create_purchase_order(supplier=supplier)
+
+		# nothing is committed yet, so a new request still gets the cached aggregates
+		clear_request_cache()
+		self.assertEqual(get_total_shipments(scorecard), 0)
+
+		run_callbacks(after_commit)
+		clear_request_cache()
+		self.assertEqual(get_total_shipments(scorecard), 1)
+
+		with patch.object(frappe.local.db, "after_commit") as after_commit:
+			po.cancel()
+
+		run_callbacks(after_commit)
+		clear_request_cache()
+		self.assertEqual(get_total_shipments(scorecard), 0)
+
+	def test_cache_cleared_for_previous_supplier(self):
+		supplier, new_supplier = create_supplier().name, create_supplier().name
+		po = create_purchase_order(supplier=supplier, do_not_submit=True)
+		versions = {s: get_cache_version(s) for s in (supplier, new_supplier)}
+
+		po.supplier = new_supplier
+		with patch.object(frappe.local.db, "after_commit") as after_commit:
+			po.save()
+
+		run_callbacks(after_commit)
+		for s, version in versions.items():
+			self.assertNotEqual(get_cache_version(s), version)
+
+	def test_purchase_variables(self):
+		supplier = create_supplier().name
+		schedule_date = add_days(nowdate(), -10)
+
+		po = create_purchase_order(
+			supplier=supplier,
+			transaction_date=add_days(nowdate(), -20),
+			qty=10,
+			rate=100,
+			do_not_save=True,
+		)
+		po.schedule_date = schedule_date
+		po.items[0].schedule_date = schedule_date
+		po.set_missing_values()
+		po.insert()
+		po.submit()
+
+		# 6 of 10 received two days late, 1 of them rejected
+		pr = make_purchase_receipt(po.name)
+		pr.set_posting_time = 1
+		pr.posting_date = add_days(nowdate(), -8)
+		pr.items[0].received_qty = 6
+		pr.items[0].qty = 5
+		pr.items[0].rejected_qty = 1
+		pr.items[0].rejected_warehouse = "_Test Rejected Warehouse - _TC"
+		pr.insert()
+		pr.submit()
+
+		scorecard = get_scorecard_period(
+			supplier, start_date=add_days(nowdate(), -30), end_date=add_days(nowdate(), -5)
+		)
+		values = compute_all_variables(scorecard)
+
+		# the 5 days from schedule to period end for all 10 ordered
+		self.assertEqual(values["get_item_workdays"], 50)
+		# 2 days late for the 5 accepted + 5 days for the 4 still missing
+		self.assertEqual(values["get_total_days_late"], 30)
+		self.assertEqual(values["get_total_shipments"], 1)
+		self.assertEqual(values["get_on_time_shipments"], 0)
+		self.assertEqual(values["get_late_shipments"], 1)
+		self.assertEqual(values["get_total_cost_of_shipments"], 1000)
+		self.assertEqual(values["get_cost_of_on_time_shipments"], 0)
+		self.assertEqual(values["get_cost_of_delayed_shipments"], 1000)
+		self.assertEqual(values["get_total_received"], 1)
+		self.assertEqual(values["get_total_received_items"], 6)
+		self.assertEqual(values["get_total_received_amount"], 600)
+		self.assertEqual(values["get_total_rejected_items"], 1)
+		self.assertEqual(values["get_total_rejected_amount"], 100)
+		self.assertEqual(values["get_total_accepted_items"], 5)
+		self.assertEqual(values["get_total_accepted_amount"], 500)
+
+	def test_rfq_variables(self):
+		supplier, other_supplier = create_supplier().name, create_supplier().name
+
+		rfq = make_request_for_quotation(
+			supplier_data=[
+				{"supplier": supplier, "supplier_name": supplier},
+				{"supplier": other_supplier, "supplier_name": other_supplier},
+			],
+			do_not_save=True,
+		)
+		rfq.transaction_date = add_days(nowdate(), -3)
+		for _i in range(2):
+			rfq.append("items", rfq.items[0].as_dict(no_default_fields=True))
+		rfq.insert()
+		rfq.submit()
+
+		quotation_dates = {supplier: nowdate(), other_supplier: add_days(nowdate(), -1)}
+		for for_supplier, transaction_date in quotation_dates.items():
+			sq = make_supplier_quotation_from_rfq(rfq.name, for_supplier=for_supplier)
+			sq.transaction_date = transaction_date
+			sq.submit()
+
+		scorecard = get_scorecard_period(
+			supplier, start_date=add_days(nowdate(), -5), end_date=nowdate()
+		)
+		values = compute_all_variables(
+			scorecard,
+			[
+				"get_rfq_total_number",
+				"get_rfq_total_items",
+				"get_sq_total_number",
+				"get_sq_total_items",
+				"get_rfq_response_days",
+			],
+		)
+
+		# the other supplier's quotation against the same RFQ items is not counted
+		self.assertEqual(values["get_rfq_total_number"], 1)
+		self.assertEqual(values["get_rfq_total_items"], 3)
+		self.assertEqual(values["get_sq_total_number"], 1)
+		self.assertEqual(values["get_sq_total_items"], 3)
+		# 3 days to quote each of the 3 items
+		self.assertEqual(values["get_rfq_response_days"], 9)
+
+
+def get_scorecard_period(supplier, start_date=None, end_date=None):
+	return frappe._dict(
+		supplier=supplier,
+		start_date=start_date or add_days(nowdate(), -1),
+		end_date=end_date or add_days(nowdate(), 7),
+	)
+
+
+def get_cache_version(supplier):
+	return frappe.cache().get_value(_get_scorecard_cache_version_key(supplier), expires=True)
+
+
+def clear_request_cache():
+	frappe.local.request_cache.clear()
+
+
+def run_callbacks(callback_manager):
+	"""Runs the scorecard cache callbacks added to the patched `callback_manager`"""
+	for call in callback_manager.add.call_args_list:
+		callback = call.args[0]
+		if callback.__qualname__.startswith("clear_scorecard_cache."):
+			callback()
+
 
 test_existing_variables = [
 	{
@@ -314,6 +314,19 @@ doc_events = {
 	tuple(period_closing_doctypes): {
 		"validate": "erpnext.accounts.doctype.accounting_period.accounting_period.validate_accounting_period_on_doc_save",
 	},
+	(
+		"Purchase Order",
+		"Purchase Receipt",
+		"Purchase Invoice",
+		"Request for Quotation",
+		"Supplier Quotation",
+	): {
+		"on_update": "erpnext.buying.doctype.supplier_scorecard_variable.supplier_scorecard_variable.clear_scorecard_cache",
+		"on_submit": "erpnext.buying.doctype.supplier_scorecard_variable.supplier_scorecard_variable.clear_scorecard_cache",
+		"on_update_after_submit": "erpnext.buying.doctype.supplier_scorecard_variable.supplier_scorecard_variable.clear_scorecard_cache",
+		"on_cancel": "erpnext.buying.doctype.supplier_scorecard_variable.supplier_scorecard_variable.clear_scorecard_cache",
+		"on_trash": "erpnext.buying.doctype.supplier_scorecard_variable.supplier_scorecard_variable.clear_scorecard_cache",
+	},
 	"Stock Entry": {
 		"on_submit": "erpnext.stock.doctype.material_request.material_request.update_completed_and_requested_qty",
 		"on_cancel": "erpnext.stock.doctype.material_request.material_request.update_completed_and_requested_qty",
@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+	for dt in (
+		"Purchase Order",
+		"Purchase Order Item",
+		"Purchase Receipt",
+		"Request for Quotation Supplier",
+	):
+		frappe.get_doc("DocType", dt).run_module_method("on_doctype_update")
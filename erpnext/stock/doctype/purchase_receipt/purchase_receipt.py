@@ -1407,3 +1407,7 @@ def get_item_account_wise_additional_cost(purchase_document):
 @erpnext.allow_regional
 def update_regional_gl_entries(gl_list, doc):
 	return
+
+
+def on_doctype_update():
+	frappe.db.add_index("Purchase Receipt", ["supplier", "posting_date"])